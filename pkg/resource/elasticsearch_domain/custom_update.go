@@ -0,0 +1,201 @@
+// Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"). You may
+// not use this file except in compliance with the License. A copy of the
+// License is located at
+//
+//     http://aws.amazon.com/apache2.0/
+//
+// or in the "license" file accompanying this file. This file is distributed
+// on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+// express or implied. See the License for the specific language governing
+// permissions and limitations under the License.
+
+package elasticsearch_domain
+
+import (
+	"context"
+	"errors"
+	"fmt"
+	"reflect"
+	"strings"
+	"time"
+
+	ackcompare "github.com/aws-controllers-k8s/runtime/pkg/compare"
+	ackerr "github.com/aws-controllers-k8s/runtime/pkg/errors"
+	ackrequeue "github.com/aws-controllers-k8s/runtime/pkg/requeue"
+	ackrtlog "github.com/aws-controllers-k8s/runtime/pkg/runtime/log"
+	svcsdk "github.com/aws/aws-sdk-go/service/elasticsearchservice"
+
+	svcapitypes "github.com/aws-controllers-k8s/elasticsearchservice-controller/apis/v1alpha1"
+)
+
+var (
+	requeueWaitWhileProcessing = ackrequeue.NeededAfter(
+		errors.New("domain is currently processing configuration changes, cannot be updated."),
+		30*time.Second,
+	)
+)
+
+// updatableFieldPaths are the spec fields customUpdateElasticsearchDomain
+// knows how to update.
+var updatableFieldPaths = []string{
+	"Spec.ElasticsearchClusterConfig.InstanceCount",
+	"Spec.EBSOptions",
+}
+
+// customUpdateElasticsearchDomain puts the data node count and EBS options of
+// the domain back to the values in the desired spec with
+// UpdateElasticsearchDomainConfig. Any other field set in the desired spec
+// that differs from the domain is reported as not implemented rather than
+// silently ignored.
+func (rm *resourceManager) customUpdateElasticsearchDomain(
+	ctx context.Context,
+	desired *resource,
+	latest *resource,
+	delta *ackcompare.Delta,
+) (updated *resource, err error) {
+	rlog := ackrtlog.FromContext(ctx)
+	exit := rlog.Trace("rm.customUpdateElasticsearchDomain")
+	defer exit(err)
+
+	if paths := unsupportedDifferences(delta); len(paths) > 0 {
+		return nil, fmt.Errorf(
+			"%w: cannot update %s", ackerr.NotImplemented, strings.Join(paths, ", "),
+		)
+	}
+
+	ko := desired.ko.DeepCopy()
+	ko.Status = *latest.ko.Status.DeepCopy()
+	rm.setStatusDefaults(ko)
+
+	input := newUpdateConfigRequestPayload(desired, latest, delta)
+	if input == nil {
+		return &resource{ko}, nil
+	}
+	// AES rejects configuration changes while the domain is still processing
+	// a previous one, so wait for it to settle before reverting.
+	if latest.ko.Status.Processing != nil && *latest.ko.Status.Processing {
+		return latest, requeueWaitWhileProcessing
+	}
+
+	_, err = rm.sdkapi.UpdateElasticsearchDomainConfigWithContext(ctx, input)
+	rm.metrics.RecordAPICall("UPDATE", "UpdateElasticsearchDomainConfig", err)
+	if err != nil {
+		return nil, err
+	}
+
+	processing := true
+	ko.Status.Processing = &processing
+	return &resource{ko}, nil
+}
+
+// unsupportedDifferences returns the paths of the differences in the delta
+// that customUpdateElasticsearchDomain cannot update. Differences where the
+// desired spec leaves the field unset are skipped, as those are values AWS
+// defaulted on the domain rather than changes asked for in the spec.
+func unsupportedDifferences(delta *ackcompare.Delta) []string {
+	paths := []string{}
+	if delta == nil {
+		return paths
+	}
+	for _, diff := range delta.Differences {
+		if isNilValue(diff.A) {
+			continue
+		}
+		supported := false
+		for _, path := range updatableFieldPaths {
+			if diff.Path.Contains(path) {
+				supported = true
+				break
+			}
+		}
+		if !supported {
+			paths = append(paths, diff.Path.String())
+		}
+	}
+	return paths
+}
+
+// isNilValue returns true if the supplied value is nil or a nil pointer, map
+// or slice.
+func isNilValue(v interface{}) bool {
+	if v == nil {
+		return true
+	}
+	rv := reflect.ValueOf(v)
+	switch rv.Kind() {
+	case reflect.Ptr, reflect.Map, reflect.Slice, reflect.Interface:
+		return rv.IsNil()
+	}
+	return false
+}
+
+// newUpdateConfigRequestPayload returns an UpdateElasticsearchDomainConfig
+// input carrying the updatable fields that differ between the desired and
+// latest resource, or nil if none of them differ.
+func newUpdateConfigRequestPayload(
+	desired *resource,
+	latest *resource,
+	delta *ackcompare.Delta,
+) *svcsdk.UpdateElasticsearchDomainConfigInput {
+	input := &svcsdk.UpdateElasticsearchDomainConfigInput{}
+	input.DomainName = desired.ko.Spec.DomainName
+	changed := false
+
+	dcc := desired.ko.Spec.ElasticsearchClusterConfig
+	lcc := latest.ko.Spec.ElasticsearchClusterConfig
+	if delta.DifferentAt("Spec.ElasticsearchClusterConfig") &&
+		dcc != nil && dcc.InstanceCount != nil &&
+		(lcc == nil || lcc.InstanceCount == nil || *dcc.InstanceCount != *lcc.InstanceCount) {
+		input.SetElasticsearchClusterConfig(&svcsdk.ElasticsearchClusterConfig{
+			InstanceCount: dcc.InstanceCount,
+		})
+		changed = true
+	}
+
+	debs := desired.ko.Spec.EBSOptions
+	if delta.DifferentAt("Spec.EBSOptions") &&
+		debs != nil && ebsOptionsDiffer(debs, latest.ko.Spec.EBSOptions) {
+		input.SetEBSOptions(&svcsdk.EBSOptions{
+			EBSEnabled: debs.EBSEnabled,
+			Iops:       debs.IOPS,
+			VolumeSize: debs.VolumeSize,
+			VolumeType: debs.VolumeType,
+		})
+		changed = true
+	}
+
+	if !changed {
+		return nil
+	}
+	return input
+}
+
+// ebsOptionsDiffer returns true if any EBS option set in the desired spec has
+// a different value in the latest observed one.
+func ebsOptionsDiffer(
+	desired *svcapitypes.EBSOptions,
+	latest *svcapitypes.EBSOptions,
+) bool {
+	if latest == nil {
+		return true
+	}
+	if desired.EBSEnabled != nil &&
+		(latest.EBSEnabled == nil || *desired.EBSEnabled != *latest.EBSEnabled) {
+		return true
+	}
+	if desired.IOPS != nil &&
+		(latest.IOPS == nil || *desired.IOPS != *latest.IOPS) {
+		return true
+	}
+	if desired.VolumeSize != nil &&
+		(latest.VolumeSize == nil || *desired.VolumeSize != *latest.VolumeSize) {
+		return true
+	}
+	if desired.VolumeType != nil &&
+		(latest.VolumeType == nil || *desired.VolumeType != *latest.VolumeType) {
+		return true
+	}
+	return false
+}
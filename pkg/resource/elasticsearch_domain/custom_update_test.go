@@ -0,0 +1,293 @@
+// Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"). You may
+// not use this file except in compliance with the License. A copy of the
+// License is located at
+//
+//     http://aws.amazon.com/apache2.0/
+//
+// or in the "license" file accompanying this file. This file is distributed
+// on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+// express or implied. See the License for the specific language governing
+// permissions and limitations under the License.
+
+package elasticsearch_domain
+
+import (
+	"reflect"
+	"testing"
+
+	"github.com/aws/aws-sdk-go/aws"
+
+	svcapitypes "github.com/aws-controllers-k8s/elasticsearchservice-controller/apis/v1alpha1"
+)
+
+func domainWithSpec(spec svcapitypes.ElasticsearchDomainSpec) *resource {
+	spec.DomainName = aws.String("my-es-domain")
+	return &resource{ko: &svcapitypes.ElasticsearchDomain{Spec: spec}}
+}
+
+func TestEBSOptionsDiffer(t *testing.T) {
+	tests := []struct {
+		name    string
+		desired *svcapitypes.EBSOptions
+		latest  *svcapitypes.EBSOptions
+		want    bool
+	}{
+		{
+			name:    "latest nil",
+			desired: &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			latest:  nil,
+			want:    true,
+		},
+		{
+			name:    "desired empty",
+			desired: &svcapitypes.EBSOptions{},
+			latest:  &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			want:    false,
+		},
+		{
+			name:    "partial desired equal",
+			desired: &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			latest: &svcapitypes.EBSOptions{
+				EBSEnabled: aws.Bool(true),
+				VolumeSize: aws.Int64(10),
+				VolumeType: aws.String("gp2"),
+			},
+			want: false,
+		},
+		{
+			name:    "desired set latest unset",
+			desired: &svcapitypes.EBSOptions{IOPS: aws.Int64(1000)},
+			latest:  &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			want:    true,
+		},
+		{
+			name: "all equal",
+			desired: &svcapitypes.EBSOptions{
+				EBSEnabled: aws.Bool(true),
+				VolumeSize: aws.Int64(10),
+				VolumeType: aws.String("gp2"),
+			},
+			latest: &svcapitypes.EBSOptions{
+				EBSEnabled: aws.Bool(true),
+				VolumeSize: aws.Int64(10),
+				VolumeType: aws.String("gp2"),
+			},
+			want: false,
+		},
+		{
+			name:    "volume size differs",
+			desired: &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			latest:  &svcapitypes.EBSOptions{VolumeSize: aws.Int64(20)},
+			want:    true,
+		},
+		{
+			name:    "volume type differs",
+			desired: &svcapitypes.EBSOptions{VolumeType: aws.String("gp2")},
+			latest:  &svcapitypes.EBSOptions{VolumeType: aws.String("io1")},
+			want:    true,
+		},
+		{
+			name:    "enabled differs",
+			desired: &svcapitypes.EBSOptions{EBSEnabled: aws.Bool(true)},
+			latest:  &svcapitypes.EBSOptions{EBSEnabled: aws.Bool(false)},
+			want:    true,
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			if got := ebsOptionsDiffer(tt.desired, tt.latest); got != tt.want {
+				t.Errorf("ebsOptionsDiffer() = %v, want %v", got, tt.want)
+			}
+		})
+	}
+}
+
+func TestNewUpdateConfigRequestPayload(t *testing.T) {
+	tests := []struct {
+		name            string
+		desired         svcapitypes.ElasticsearchDomainSpec
+		latest          svcapitypes.ElasticsearchDomainSpec
+		wantNil         bool
+		wantClusterConf bool
+		wantEBS         bool
+	}{
+		{
+			name: "equal",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			},
+			wantNil: true,
+		},
+		{
+			name:    "desired unset",
+			desired: svcapitypes.ElasticsearchDomainSpec{},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			},
+			wantNil: true,
+		},
+		{
+			name: "only defaulted fields differ",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{
+					InstanceCount: aws.Int64(1),
+					InstanceType:  aws.String("m4.large.elasticsearch"),
+				},
+			},
+			wantNil: true,
+		},
+		{
+			name: "instance count differs",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(2)},
+			},
+			wantClusterConf: true,
+		},
+		{
+			name: "instance count missing from latest",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+			},
+			latest:          svcapitypes.ElasticsearchDomainSpec{},
+			wantClusterConf: true,
+		},
+		{
+			name: "EBS volume size differs",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				EBSOptions: &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				EBSOptions: &svcapitypes.EBSOptions{VolumeSize: aws.Int64(20)},
+			},
+			wantEBS: true,
+		},
+		{
+			name: "both differ",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(2)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(20)},
+			},
+			wantClusterConf: true,
+			wantEBS:         true,
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			desired := domainWithSpec(tt.desired)
+			latest := domainWithSpec(tt.latest)
+			got := newUpdateConfigRequestPayload(desired, latest, newResourceDelta(desired, latest))
+			if tt.wantNil {
+				if got != nil {
+					t.Fatalf("newUpdateConfigRequestPayload() = %v, want nil", got)
+				}
+				return
+			}
+			if got == nil {
+				t.Fatal("newUpdateConfigRequestPayload() = nil, want input")
+			}
+			if *got.DomainName != "my-es-domain" {
+				t.Errorf("DomainName = %q, want %q", *got.DomainName, "my-es-domain")
+			}
+			if (got.ElasticsearchClusterConfig != nil) != tt.wantClusterConf {
+				t.Errorf("ElasticsearchClusterConfig = %v, want set: %v", got.ElasticsearchClusterConfig, tt.wantClusterConf)
+			}
+			if tt.wantClusterConf && *got.ElasticsearchClusterConfig.InstanceCount != *tt.desired.ElasticsearchClusterConfig.InstanceCount {
+				t.Errorf("InstanceCount = %d, want %d", *got.ElasticsearchClusterConfig.InstanceCount, *tt.desired.ElasticsearchClusterConfig.InstanceCount)
+			}
+			if (got.EBSOptions != nil) != tt.wantEBS {
+				t.Errorf("EBSOptions = %v, want set: %v", got.EBSOptions, tt.wantEBS)
+			}
+			if tt.wantEBS && *got.EBSOptions.VolumeSize != *tt.desired.EBSOptions.VolumeSize {
+				t.Errorf("VolumeSize = %d, want %d", *got.EBSOptions.VolumeSize, *tt.desired.EBSOptions.VolumeSize)
+			}
+		})
+	}
+}
+
+func TestUnsupportedDifferences(t *testing.T) {
+	tests := []struct {
+		name    string
+		desired svcapitypes.ElasticsearchDomainSpec
+		latest  svcapitypes.ElasticsearchDomainSpec
+		want    []string
+	}{
+		{
+			name:    "no differences",
+			desired: svcapitypes.ElasticsearchDomainSpec{},
+			latest:  svcapitypes.ElasticsearchDomainSpec{},
+			want:    []string{},
+		},
+		{
+			name: "supported differences",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(1)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(10)},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{InstanceCount: aws.Int64(2)},
+				EBSOptions:                 &svcapitypes.EBSOptions{VolumeSize: aws.Int64(20)},
+			},
+			want: []string{},
+		},
+		{
+			name:    "field defaulted by AWS",
+			desired: svcapitypes.ElasticsearchDomainSpec{},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				AccessPolicies: aws.String("{}"),
+			},
+			want: []string{},
+		},
+		{
+			name: "unsupported field set in spec",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				AccessPolicies: aws.String(`{"Version":"2012-10-17"}`),
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				AccessPolicies: aws.String("{}"),
+			},
+			want: []string{"Spec.AccessPolicies"},
+		},
+		{
+			name: "unsupported cluster config field",
+			desired: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{
+					InstanceType: aws.String("r5.large.elasticsearch"),
+				},
+			},
+			latest: svcapitypes.ElasticsearchDomainSpec{
+				ElasticsearchClusterConfig: &svcapitypes.ElasticsearchClusterConfig{
+					InstanceType: aws.String("m4.large.elasticsearch"),
+				},
+			},
+			want: []string{"Spec.ElasticsearchClusterConfig.InstanceType"},
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			desired := domainWithSpec(tt.desired)
+			latest := domainWithSpec(tt.latest)
+			got := unsupportedDifferences(newResourceDelta(desired, latest))
+			if !reflect.DeepEqual(got, tt.want) {
+				t.Errorf("unsupportedDifferences() = %v, want %v", got, tt.want)
+			}
+		})
+	}
+}
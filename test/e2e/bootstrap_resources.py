@@ -13,6 +13,7 @@
 """Declares the structure of the bootstrapped resources and provides a loader
 for them.
 """
+import os
 from dataclasses import dataclass
 
 from e2e import bootstrap_directory
@@ -27,10 +28,19 @@ class TestBootstrapResources:
     VPCSubnetIDs: list
     ServiceLinkedRoleName: str
 
+# Names the bootstrap file to load when the tests are run for a single region
+# of a multi-region run. See e2e.multi_region.
+BOOTSTRAP_FILE_NAME_ENV = "ACK_BOOTSTRAP_FILE_NAME"
+
+def bootstrap_file_name_for_region(region: str) -> str:
+    return f"bootstrap-{region}.yaml"
+
 _bootstrap_resources = None
 
-def get_bootstrap_resources(bootstrap_file_name: str = "bootstrap.yaml"):
+def get_bootstrap_resources(bootstrap_file_name: str = None):
     global _bootstrap_resources
+    if bootstrap_file_name is None:
+        bootstrap_file_name = os.environ.get(BOOTSTRAP_FILE_NAME_ENV, "bootstrap.yaml")
     if _bootstrap_resources is None:
         _bootstrap_resources = TestBootstrapResources(
             **read_bootstrap_config(bootstrap_directory, bootstrap_file_name=bootstrap_file_name),
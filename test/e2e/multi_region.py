@@ -0,0 +1,334 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+#	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+"""Runs the Elasticsearch Service integration tests in several regions at
+once and merges the results into a single report.
+
+Each region is bootstrapped into its own `bootstrap-<region>.yaml` and has
+its tests run against its own cluster, so every region needs a controller
+deployed for it. Regions are given as `<region>[=<kubeconfig>]`, and the
+kubeconfig may only be left out when a single region is given:
+
+    python -m e2e.multi_region us-west-2=~/.kube/usw2 eu-west-1=~/.kube/euw1
+"""
+
+import argparse
+import json
+import logging
+import os
+import shlex
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import boto3
+
+from acktest import resources
+
+from e2e import bootstrap_directory
+from e2e.bootstrap_resources import (
+    BOOTSTRAP_FILE_NAME_ENV,
+    bootstrap_file_name_for_region,
+)
+from e2e.service_bootstrap import service_bootstrap
+from e2e.service_cleanup import delete_service_linked_role, service_cleanup
+
+DEFAULT_TESTS_PATH = str(Path(__file__).parent / "tests")
+DEFAULT_REPORT_DIRECTORY = Path(__file__).parent / "multi-region-report"
+
+
+@dataclass
+class RegionTarget:
+    region: str
+    kubeconfig: str = None
+
+
+@dataclass
+class TestResult:
+    name: str
+    outcome: str
+    duration_seconds: float
+
+
+@dataclass
+class RegionReport:
+    region: str
+    bootstrap_seconds: float = 0.0
+    test_seconds: float = 0.0
+    exit_code: int = None
+    error: str = None
+    results: List[TestResult] = field(default_factory=list)
+
+
+def parse_target(arg: str) -> RegionTarget:
+    region, _, kubeconfig = arg.partition("=")
+    return RegionTarget(region, os.path.expanduser(kubeconfig) if kubeconfig else None)
+
+
+def validate_targets(targets: List[RegionTarget]):
+    """Raises ValueError unless every region is named and given once and,
+    when there is more than one, each has a kubeconfig of its own. The tests
+    use fixed CR names, so two regions sharing a cluster would collide.
+    """
+    if not targets:
+        raise ValueError("at least one region is required")
+
+    regions = [t.region for t in targets]
+    if not all(regions):
+        raise ValueError("region names must not be empty")
+    duplicates = {r for r in regions if regions.count(r) > 1}
+    if duplicates:
+        raise ValueError(f"regions given more than once: {', '.join(sorted(duplicates))}")
+
+    if len(targets) == 1:
+        return
+    missing = [t.region for t in targets if t.kubeconfig is None]
+    if missing:
+        raise ValueError(f"a kubeconfig is required for every region, missing for: {', '.join(missing)}")
+    kubeconfigs = [os.path.realpath(t.kubeconfig) for t in targets]
+    shared = {k for k in kubeconfigs if kubeconfigs.count(k) > 1}
+    if shared:
+        raise ValueError(f"each region needs its own kubeconfig, shared: {', '.join(sorted(shared))}")
+
+
+def bootstrap_region(target: RegionTarget) -> dict:
+    config = service_bootstrap(target.region, boto3.session.Session())
+    resources.write_bootstrap_config(
+        config,
+        bootstrap_directory,
+        bootstrap_file_name=bootstrap_file_name_for_region(target.region),
+    )
+    return config
+
+
+def region_env(target: RegionTarget) -> Dict[str, str]:
+    env = os.environ.copy()
+    env["AWS_REGION"] = target.region
+    env["AWS_DEFAULT_REGION"] = target.region
+    env[BOOTSTRAP_FILE_NAME_ENV] = bootstrap_file_name_for_region(target.region)
+    if target.kubeconfig is not None:
+        env["KUBECONFIG"] = target.kubeconfig
+    return env
+
+
+def read_junit_results(junit_path: Path) -> List[TestResult]:
+    results = []
+    for case in ET.parse(junit_path).getroot().iter("testcase"):
+        outcome = "passed"
+        for tag in ("failure", "error", "skipped"):
+            if case.find(tag) is not None:
+                outcome = "failed" if tag == "failure" else tag
+                break
+        results.append(TestResult(
+            f"{case.get('classname')}::{case.get('name')}",
+            outcome,
+            float(case.get("time", 0)),
+        ))
+    return results
+
+
+def run_region(
+    target: RegionTarget,
+    report_directory: Path,
+    pytest_args: List[str],
+) -> RegionReport:
+    """Bootstraps a single region and runs the test suite against it in a
+    pytest subprocess so that each region gets its own AWS clients and
+    bootstrap resources.
+    """
+    report = RegionReport(target.region)
+
+    start = time.monotonic()
+    try:
+        bootstrap_region(target)
+    except Exception as e:
+        logging.exception(f"Unable to bootstrap region {target.region}")
+        report.error = f"bootstrap failed: {e}"
+        return report
+    report.bootstrap_seconds = time.monotonic() - start
+    logging.info(f"Bootstrapped region {target.region} in {report.bootstrap_seconds:.0f}s")
+
+    junit_path = report_directory / f"{target.region}.xml"
+    log_path = report_directory / f"{target.region}.log"
+    cmd = [
+        sys.executable, "-m", "pytest",
+        f"--junitxml={junit_path}",
+        *pytest_args,
+    ]
+
+    # Record rather than raise failures from here on, so one region's broken
+    # run cannot keep the other regions from reporting or being cleaned up.
+    start = time.monotonic()
+    try:
+        with open(log_path, "w") as log:
+            report.exit_code = subprocess.call(
+                cmd,
+                cwd=bootstrap_directory.parent,
+                env=region_env(target),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        report.test_seconds = time.monotonic() - start
+        logging.info(f"Tests in region {target.region} exited with {report.exit_code} after {report.test_seconds:.0f}s")
+
+        if junit_path.exists():
+            report.results = read_junit_results(junit_path)
+        else:
+            report.error = f"no test results written, see {log_path}"
+    except Exception as e:
+        logging.exception(f"Unable to run tests in region {target.region}")
+        report.test_seconds = time.monotonic() - start
+        report.error = f"test run failed: {e}"
+    return report
+
+
+def cleanup_region(target: RegionTarget) -> Tuple[str, bool]:
+    """Deletes the region's bootstrapped resources other than the
+    account-global service-linked role. Returns the role's name, so it can be
+    deleted once for all regions, and whether every resource was deleted.
+    """
+    bootstrap_file_name = bootstrap_file_name_for_region(target.region)
+    bootstrap_path = bootstrap_directory / bootstrap_file_name
+    if not bootstrap_path.exists():
+        return None, True
+    config = resources.read_bootstrap_config(
+        bootstrap_directory,
+        bootstrap_file_name=bootstrap_file_name,
+    )
+    succeeded = service_cleanup(config, target.region, boto3.session.Session(), delete_slr=False)
+    if succeeded:
+        bootstrap_path.unlink()
+    else:
+        logging.error(f"Keeping {bootstrap_path} as not all resources in region {target.region} were deleted")
+    return config["ServiceLinkedRoleName"], succeeded
+
+
+def cleanup_regions(targets: List[RegionTarget]):
+    """Cleans up every region in parallel, then deletes the shared
+    service-linked role once, provided every region was cleaned up.
+    """
+    slr_names = set()
+    failed = []
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = [executor.submit(cleanup_region, t) for t in targets]
+        for target, future in zip(targets, futures):
+            try:
+                slr_name, succeeded = future.result()
+            except:
+                logging.exception(f"Unable to clean up region {target.region}")
+                failed.append(target.region)
+                continue
+            if slr_name is not None:
+                slr_names.add(slr_name)
+            if not succeeded:
+                failed.append(target.region)
+
+    # Resources left behind in a region may still be using the role.
+    if failed:
+        logging.error(f"Not deleting SLR {', '.join(sorted(slr_names))} as cleanup failed in: {', '.join(failed)}")
+        return
+    for slr_name in slr_names:
+        try:
+            delete_service_linked_role(slr_name, targets[0].region, boto3.session.Session())
+        except:
+            logging.exception(f"Unable to delete SLR {slr_name}")
+
+
+def format_report(reports: List[RegionReport]) -> str:
+    """Lays the per-test outcome and duration for each region out side by
+    side, followed by the bootstrap and total test time of each region.
+    """
+    regions = [r.region for r in reports]
+    by_region = {r.region: {t.name: t for t in r.results} for r in reports}
+    names = sorted({name for results in by_region.values() for name in results})
+
+    name_width = max([len("test")] + [len(n) for n in names])
+    col_width = max([16] + [len(r) for r in regions])
+
+    lines = [
+        "test".ljust(name_width) + "".join(f"  {r:>{col_width}}" for r in regions),
+    ]
+    for name in names:
+        row = name.ljust(name_width)
+        for region in regions:
+            result = by_region[region].get(name)
+            cell = "-" if result is None else f"{result.outcome} {result.duration_seconds:.0f}s"
+            row += f"  {cell:>{col_width}}"
+        lines.append(row)
+
+    lines.append("")
+    for r in reports:
+        line = f"{r.region}: bootstrap {r.bootstrap_seconds:.0f}s, tests {r.test_seconds:.0f}s, exit code {r.exit_code}"
+        if r.error is not None:
+            line += f", error: {r.error}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def multi_region(
+    targets: List[RegionTarget],
+    report_directory: Path = DEFAULT_REPORT_DIRECTORY,
+    pytest_args: List[str] = None,
+    cleanup: bool = True,
+) -> List[RegionReport]:
+    validate_targets(targets)
+    if pytest_args is None:
+        pytest_args = [DEFAULT_TESTS_PATH]
+
+    logging.getLogger().setLevel(logging.INFO)
+    report_directory.mkdir(parents=True, exist_ok=True)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            reports = list(executor.map(
+                lambda target: run_region(target, report_directory, pytest_args),
+                targets,
+            ))
+    finally:
+        if cleanup:
+            cleanup_regions(targets)
+
+    with open(report_directory / "report.json", "w") as f:
+        json.dump([r.__dict__ for r in reports], f, default=lambda o: o.__dict__, indent=2)
+
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("regions", nargs="+", help="<region>[=<kubeconfig>]")
+    parser.add_argument("--report-dir", type=Path, default=DEFAULT_REPORT_DIRECTORY)
+    parser.add_argument("--no-cleanup", action="store_true", help="keep bootstrapped resources")
+    parser.add_argument("--pytest-args", default=DEFAULT_TESTS_PATH, help="arguments passed to pytest in each region")
+    args = parser.parse_args()
+
+    targets = [parse_target(r) for r in args.regions]
+    try:
+        validate_targets(targets)
+    except ValueError as e:
+        parser.error(str(e))
+
+    reports = multi_region(
+        targets,
+        report_directory=args.report_dir,
+        pytest_args=shlex.split(args.pytest_args),
+        cleanup=not args.no_cleanup,
+    )
+    print(format_report(reports))
+
+    failed = any(r.error is not None or r.exit_code != 0 for r in reports)
+    sys.exit(1 if failed else 0)
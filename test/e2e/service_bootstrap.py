@@ -112,12 +112,20 @@ def create_service_linked_role(iam) -> str:
     return slr_name
 
 
-def service_bootstrap() -> dict:
+def service_bootstrap(
+    region: str = None,
+    session: boto3.session.Session = None,
+) -> dict:
     logging.getLogger().setLevel(logging.INFO)
 
-    region = identity.get_region()
-    ec2 = boto3.client("ec2", region_name=region)
-    iam = boto3.client("iam", region_name=region)
+    if region is None:
+        region = identity.get_region()
+    # The default boto3 session is not thread-safe, so callers bootstrapping
+    # several regions at once pass a session of their own.
+    if session is None:
+        session = boto3.session.Session()
+    ec2 = session.client("ec2", region_name=region)
+    iam = session.client("iam", region_name=region)
     # only normal zones, no localzones
     azs = map(lambda zone: zone['ZoneName'],
             filter(lambda zone: zone['OptInStatus'] == 'opt-in-not-required', ec2.describe_availability_zones()['AvailabilityZones']))
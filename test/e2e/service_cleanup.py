@@ -24,27 +24,48 @@ from e2e import bootstrap_directory
 from e2e.bootstrap_resources import TestBootstrapResources
 
 
-def delete_subnet(subnet_id: str):
-    region = identity.get_region()
-    ec2 = boto3.client("ec2", region_name=region)
+def delete_subnet(
+    subnet_id: str,
+    region: str = None,
+    session: boto3.session.Session = None,
+):
+    if region is None:
+        region = identity.get_region()
+    if session is None:
+        session = boto3.session.Session()
+    ec2 = session.client("ec2", region_name=region)
 
     ec2.delete_subnet(SubnetId=subnet_id)
 
     logging.info(f"Deleted VPC Subnet {subnet_id}")
 
 
-def delete_vpc(vpc_id: str):
-    region = identity.get_region()
-    ec2 = boto3.client("ec2", region_name=region)
+def delete_vpc(
+    vpc_id: str,
+    region: str = None,
+    session: boto3.session.Session = None,
+):
+    if region is None:
+        region = identity.get_region()
+    if session is None:
+        session = boto3.session.Session()
+    ec2 = session.client("ec2", region_name=region)
 
     ec2.delete_vpc(VpcId=vpc_id)
 
     logging.info(f"Deleted VPC {vpc_id}")
 
 
-def delete_service_linked_role(slr_name: str):
-    region = identity.get_region()
-    iam = boto3.client("iam", region_name=region)
+def delete_service_linked_role(
+    slr_name: str,
+    region: str = None,
+    session: boto3.session.Session = None,
+):
+    if region is None:
+        region = identity.get_region()
+    if session is None:
+        session = boto3.session.Session()
+    iam = session.client("iam", region_name=region)
     
     iam.delete_service_linked_role(RoleName=slr_name)
 
@@ -58,28 +79,46 @@ def delete_service_linked_role(slr_name: str):
 
     logging.info(f"Deleted service-linked role {slr_name}")
 
-def service_cleanup(config: dict):
+def service_cleanup(
+    config: dict,
+    region: str = None,
+    session: boto3.session.Session = None,
+    delete_slr: bool = True,
+) -> bool:
+    """Deletes the bootstrapped resources, logging rather than raising on
+    failure. Returns True if every resource was deleted.
+
+    The service-linked role is global to the account, so callers cleaning up
+    several regions pass delete_slr=False and delete it once themselves.
+    """
     logging.getLogger().setLevel(logging.INFO)
 
     resources = TestBootstrapResources(
         **config
     )
+    succeeded = True
 
     for subnet in resources.VPCSubnetIDs:
         try:
-            delete_subnet(subnet)
+            delete_subnet(subnet, region, session)
         except:
             logging.exception(f"Unable to delete VPC subnet {subnet}")
+            succeeded = False
 
     try:
-        delete_vpc(resources.VPCID)
+        delete_vpc(resources.VPCID, region, session)
     except:
         logging.exception(f"Unable to delete VPC {resources.VPCID}")
+        succeeded = False
 
-    try:
-        delete_service_linked_role(resources.ServiceLinkedRoleName)
-    except:
-        logging.exception(f"Unable to delete SLR {resources.ServiceLinkedRoleName}")
+    if delete_slr:
+        try:
+            delete_service_linked_role(resources.ServiceLinkedRoleName, region, session)
+        except:
+            logging.exception(f"Unable to delete SLR {resources.ServiceLinkedRoleName}")
+            succeeded = False
+
+    return succeeded
 
 
 if __name__ == "__main__":   
@@ -19,10 +19,15 @@ import boto3
 import datetime
 import pytest
 import logging
+import os
+import re
 import time
+import yaml
+from pathlib import Path
 from typing import Dict
 
 from acktest.k8s import resource as k8s
+from kubernetes import client
 
 from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
@@ -38,6 +43,26 @@ DELETE_TIMEOUT_SECONDS = 10*60
 CREATE_WAIT_INTERVAL_SLEEP_SECONDS = 20
 CREATE_TIMEOUT_SECONDS = 30*60
 
+DRIFT_WAIT_INTERVAL_SLEEP_SECONDS = 10
+DRIFT_RUN_COUNT = 3
+# The out-of-band change and the controller's revert each put the domain
+# through a blue/green deployment, and the controller only reverts once the
+# first one has finished.
+DRIFT_UPDATE_TIMEOUT_SECONDS = 30*60
+
+# The controller's requeue_on_success_seconds is read from here, so the drift
+# timeout and report follow whatever resync period the controller is built
+# with.
+GENERATOR_CONFIG_PATH = Path(__file__).parents[3] / "generator.yaml"
+
+# Defaults match config/controller. Override for a Helm install, whose metrics
+# Service is named after the release.
+CONTROLLER_NAMESPACE = os.environ.get("ACK_CONTROLLER_NAMESPACE", "ack-system")
+CONTROLLER_METRICS_SERVICE = os.environ.get(
+    "ACK_CONTROLLER_METRICS_SERVICE", "ack-elasticsearchservice-metrics-service",
+)
+CONTROLLER_METRICS_PORT_NAME = "metricsport"
+
 
 @dataclass
 class Domain:
@@ -48,6 +73,18 @@ class Domain:
     is_vpc: bool = False
     vpc_id: str = None
     vpc_subnets: list = field(default_factory=list)
+    ebs_volume_size: int = 10
+
+
+@dataclass
+class DriftRun:
+    # Until the controller first read the domain after the out-of-band change
+    detect_seconds: float
+    # Until the controller called UpdateElasticsearchDomainConfig to revert it
+    revert_seconds: float
+    # Until the domain was back to its CR spec and done processing
+    converge_seconds: float
+    controller_api_calls: Dict[str, int]
 
 
 @pytest.fixture(scope="module")
@@ -92,6 +129,81 @@ def wait_for_delete_or_die(es_client, resource, timeout):
             break
 
 
+def get_controller_resync_period_seconds() -> int:
+    with open(GENERATOR_CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+    return config['resources']['ElasticsearchDomain']['reconcile']['requeue_on_success_seconds']
+
+
+def get_controller_api_call_counts(k8s_client) -> Dict[str, int]:
+    """Scrapes the controller's Prometheus metrics endpoint through the
+    Kubernetes API server service proxy and returns the number of AWS API
+    calls the controller has made so far, keyed by operation name.
+    """
+    core = client.CoreV1Api(k8s_client)
+    metrics = core.connect_get_namespaced_service_proxy_with_path(
+        f"{CONTROLLER_METRICS_SERVICE}:{CONTROLLER_METRICS_PORT_NAME}",
+        CONTROLLER_NAMESPACE,
+        "metrics",
+    )
+
+    counts = {}
+    for line in metrics.splitlines():
+        if line.startswith("#"):
+            continue
+        sample, _, value = line.rpartition(" ")
+        name, _, labels = sample.partition("{")
+        if not name.endswith("api_call_count"):
+            continue
+        op = re.search(r'op_id="([^"]*)"', labels)
+        op = op.group(1) if op else labels.rstrip("}")
+        counts[op] = counts.get(op, 0) + int(float(value))
+    return counts
+
+
+def diff_api_call_counts(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    diff = {op: count - before.get(op, 0) for op, count in after.items()}
+    return {op: count for op, count in diff.items() if count > 0}
+
+
+def domain_matches_spec(aws_res, resource) -> bool:
+    status = aws_res['DomainStatus']
+    return status['ElasticsearchClusterConfig']['InstanceCount'] == resource.data_node_count and \
+        status['EBSOptions']['VolumeSize'] == resource.ebs_volume_size
+
+
+def wait_for_drift_correction_or_die(es_client, k8s_client, resource, start, timeout, before):
+    """Polls the controller's API call counts and the AES API until the
+    controller has put the domain back to its CR spec. Returns the seconds
+    elapsed from `start` until the controller first described the domain,
+    until it called UpdateElasticsearchDomainConfig, and until the domain
+    finished processing the revert.
+
+    Nothing but the next resync makes the controller look at a synced domain,
+    so the first describe after `start` is the one that notices the drift.
+    """
+    detect_seconds = None
+    revert_seconds = None
+    while True:
+        if datetime.datetime.now() >= timeout:
+            pytest.fail("Timed out waiting for controller to correct drift on ES Domain")
+        time.sleep(DRIFT_WAIT_INTERVAL_SLEEP_SECONDS)
+
+        calls = diff_api_call_counts(before, get_controller_api_call_counts(k8s_client))
+        elapsed = (datetime.datetime.now() - start).total_seconds()
+        if detect_seconds is None and calls.get("DescribeElasticsearchDomain"):
+            detect_seconds = elapsed
+        if revert_seconds is None and calls.get("UpdateElasticsearchDomainConfig"):
+            revert_seconds = elapsed
+        if revert_seconds is None:
+            continue
+
+        aws_res = es_client.describe_elasticsearch_domain(DomainName=resource.name)
+        if domain_matches_spec(aws_res, resource) and aws_res['DomainStatus']['Processing'] == False:
+            converge_seconds = (datetime.datetime.now() - start).total_seconds()
+            return detect_seconds, revert_seconds, converge_seconds
+
+
 @service_marker
 @pytest.mark.canary
 class TestDomain:
@@ -284,3 +396,118 @@ class TestDomain:
 
         # Domain should no longer appear in AES
         wait_for_delete_or_die(es_client, resource, timeout)
+
+
+@pytest.fixture
+def drift_domain(es_client):
+    resource = Domain(name="my-es-domain-drift", data_node_count=1, ebs_volume_size=10)
+
+    replacements = REPLACEMENT_VALUES.copy()
+    replacements["DOMAIN_NAME"] = resource.name
+    replacements["DATA_NODE_COUNT"] = str(resource.data_node_count)
+    replacements["EBS_VOLUME_SIZE"] = str(resource.ebs_volume_size)
+
+    resource_data = load_resource(
+        "domain_es_xd7.9",
+        additional_replacements=replacements,
+    )
+    logging.debug(resource_data)
+
+    # Create the k8s resource
+    ref = k8s.CustomResourceReference(
+        CRD_GROUP, CRD_VERSION, RESOURCE_PLURAL,
+        resource.name, namespace="default",
+    )
+    k8s.create_custom_resource(ref, resource_data)
+
+    try:
+        cr = k8s.wait_resource_consumed_by_controller(ref)
+
+        assert cr is not None
+        assert k8s.get_resource_exists(ref)
+
+        logging.debug(cr)
+
+        now = datetime.datetime.now()
+        timeout = now + datetime.timedelta(seconds=CREATE_TIMEOUT_SECONDS)
+
+        aws_res = wait_for_create_or_die(es_client, resource, timeout)
+        logging.info(f"ES Domain {resource.name} creation succeeded and DomainStatus.Processing is now False")
+
+        assert domain_matches_spec(aws_res, resource)
+
+        yield resource
+    finally:
+        k8s.delete_custom_resource(ref)
+
+        logging.info(f"Deleted CR for ES Domain {resource.name}. Waiting {DELETE_WAIT_AFTER_SECONDS} before checking existence in AWS API")
+        time.sleep(DELETE_WAIT_AFTER_SECONDS)
+
+        now = datetime.datetime.now()
+        timeout = now + datetime.timedelta(seconds=DELETE_TIMEOUT_SECONDS)
+
+        # Domain should no longer appear in AES
+        wait_for_delete_or_die(es_client, resource, timeout)
+
+
+@service_marker
+@pytest.mark.slow
+class TestDomainDrift:
+    def test_drift_correction_latency_7_9(self, es_client, k8s_client, drift_domain):
+        resource = drift_domain
+        resync_period_seconds = get_controller_resync_period_seconds()
+        assert resync_period_seconds > 0, "controller does not resync synced domains, drift is never noticed"
+        drift_timeout_seconds = resync_period_seconds + 2*DRIFT_UPDATE_TIMEOUT_SECONDS
+
+        # Change the domain out of band and time how long the controller takes
+        # to notice the drift and put the domain back to the CR spec. Repeating
+        # the change lands it at different offsets into the resync period, so
+        # the spread of detection times between runs shows the resync effect,
+        # while revert and convergence times are dominated by the blue/green
+        # deployments.
+        runs = []
+        for i in range(DRIFT_RUN_COUNT):
+            before = get_controller_api_call_counts(k8s_client)
+            start = datetime.datetime.now()
+            es_client.update_elasticsearch_domain_config(
+                DomainName=resource.name,
+                ElasticsearchClusterConfig={
+                    'InstanceCount': resource.data_node_count + 1,
+                },
+                EBSOptions={
+                    'EBSEnabled': True,
+                    'VolumeSize': resource.ebs_volume_size + 10,
+                    'VolumeType': 'gp2',
+                },
+            )
+            logging.info(f"Changed ES Domain {resource.name} out of band (run {i+1}/{DRIFT_RUN_COUNT})")
+
+            timeout = start + datetime.timedelta(seconds=drift_timeout_seconds)
+            detect_seconds, revert_seconds, converge_seconds = wait_for_drift_correction_or_die(
+                es_client, k8s_client, resource, start, timeout, before,
+            )
+            # Includes calls made for any other resources the controller is
+            # reconciling at the same time.
+            calls = diff_api_call_counts(before, get_controller_api_call_counts(k8s_client))
+            runs.append(DriftRun(detect_seconds, revert_seconds, converge_seconds, calls))
+            logging.info(
+                f"ES Domain {resource.name} drift run {i+1}: detected after {detect_seconds:.0f}s, "
+                f"reverted after {revert_seconds:.0f}s, converged after {converge_seconds:.0f}s, "
+                f"controller API calls {calls}"
+            )
+
+        for i, run in enumerate(runs):
+            logging.info(
+                f"drift run {i+1}: detect={run.detect_seconds:.0f}s "
+                f"resync_periods={run.detect_seconds / resync_period_seconds:.2f} "
+                f"revert={run.revert_seconds:.0f}s converge={run.converge_seconds:.0f}s "
+                f"controller_api_calls={sum(run.controller_api_calls.values())} {run.controller_api_calls}"
+            )
+        detect = [run.detect_seconds for run in runs]
+        converge = [run.converge_seconds for run in runs]
+        logging.info(
+            f"drift detection over {len(runs)} runs: min={min(detect):.0f}s "
+            f"max={max(detect):.0f}s mean={sum(detect)/len(detect):.0f}s "
+            f"(resync period {resync_period_seconds}s); convergence "
+            f"min={min(converge):.0f}s max={max(converge):.0f}s mean={sum(converge)/len(converge):.0f}s"
+        )